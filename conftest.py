@@ -0,0 +1,30 @@
+import os
+
+# Тесты работают с in-memory базой: без дискового I/O и без
+# загрязнения cookbook.db между запусками. Переменная должна быть
+# выставлена до импорта main (движки создаются при импорте database)
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite+aiosqlite:///file::memory:?cache=shared&uri=true"
+)
+
+import pytest_asyncio  # noqa: E402
+from asgi_lifespan import LifespanManager  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from main import app  # noqa: E402
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client():
+    """
+    Один клиент на всю тестовую сессию.
+
+    LifespanManager запускает lifespan приложения (создание таблиц,
+    фоновый сброс просмотров) один раз, а не на каждый тест, и все
+    запросы идут через общий event loop и соединение.
+    """
+    async with LifespanManager(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://testserver"
+        ) as test_client:
+            yield test_client
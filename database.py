@@ -1,25 +1,213 @@
-from typing import AsyncGenerator
+import os
+from contextvars import ContextVar
+from itertools import count
+from typing import Optional
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
+    async_scoped_session,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-DATABASE_URL = "sqlite+aiosqlite:///./cookbook.db"
+# URL базы можно переопределить через окружение — тесты подставляют
+# in-memory базу и не трогают файл на диске
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./cookbook.db")
+
+
+def _derive_readonly_url(url: str) -> str:
+    """
+    Строит read-only URI (mode=ro) из пишущего URL, чтобы читающий
+    пул всегда указывал на ту же базу, что и пишущий.
+    """
+    path = make_url(url).database or ""
+    return f"sqlite+aiosqlite:///file:{path}?mode=ro&uri=true"
+
+
+_READONLY_URL_ENV = os.getenv("READONLY_DATABASE_URL")
+READONLY_DATABASE_URL = _READONLY_URL_ENV or _derive_readonly_url(DATABASE_URL)
+
+_IN_MEMORY = ":memory:" in DATABASE_URL
+
+# Логирование SQL только по явному запросу: echo форматирует и пишет
+# каждый statement с параметрами, что заметно тормозит горячий путь
+_SQL_ECHO = os.getenv("SQL_ECHO") == "1"
 
 
 class Base(DeclarativeBase):
     """Базовый класс для всех моделей"""
 
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-async_session_maker = async_sessionmaker(
-    bind=engine, expire_on_commit=False, class_=AsyncSession
+def _set_sqlite_pragmas(dbapi_conn, _connection_record) -> None:
+    """
+    Настраивает PRAGMA-параметры SQLite для каждого нового соединения.
+
+    - journal_mode=WAL: читатели не блокируются писателем
+    - busy_timeout: ожидание вместо мгновенной ошибки SQLITE_BUSY
+    - synchronous=NORMAL: меньше fsync на коммит (безопасно в WAL)
+    - cache_size=-20000: ~20МБ страничного кэша в памяти
+    - temp_store=memory: временные структуры без обращения к диску
+    - foreign_keys=ON: проверка внешних ключей
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-20000")
+    cursor.execute("PRAGMA temp_store=memory")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _set_sqlite_readonly_pragmas(dbapi_conn, _connection_record) -> None:
+    """
+    Настраивает PRAGMA-параметры для read-only соединений.
+    Режим журнала задает пишущее соединение, поэтому здесь
+    только параметры чтения.
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA cache_size=-20000")
+    cursor.execute("PRAGMA temp_store=memory")
+    cursor.close()
+
+
+def _begin_immediate(conn) -> None:
+    """
+    Начинает пишущие транзакции как BEGIN IMMEDIATE.
+
+    aiosqlite по умолчанию открывает DEFERRED-транзакции, и блокировка
+    записи берется только при первом UPDATE/INSERT — под нагрузкой это
+    дает гонки повышения блокировки и SQLITE_BUSY. IMMEDIATE берет
+    блокировку сразу (isolation_level=None отключает неявные BEGIN
+    драйвера, поэтому транзакцией управляем здесь).
+    """
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+if _IN_MEMORY:
+    # In-memory база живет, пока открыто хотя бы одно соединение
+    # (тесты используют file::memory:?cache=shared). Пул из одного
+    # соединения без overflow выдает его сессиям строго по очереди:
+    # доступ сериализован и BEGIN IMMEDIATE не накладывается на чужую
+    # незавершенную транзакцию, как это было со StaticPool, который
+    # отдавал одно соединение всем сессиям одновременно. Разделение
+    # на читателей и писателя здесь не имеет смысла.
+    write_engine = create_async_engine(
+        DATABASE_URL,
+        echo=_SQL_ECHO,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        query_cache_size=1200,
+        connect_args={
+            "timeout": 30,
+            "isolation_level": None,
+            "check_same_thread": False,
+        },
+    )
+    read_engine = write_engine
+else:
+    # Писатель один: SQLite допускает только одну активную запись,
+    # поэтому пул из одного соединения исключает гонки SQLITE_BUSY.
+    write_engine = create_async_engine(
+        DATABASE_URL,
+        echo=_SQL_ECHO,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        query_cache_size=1200,
+        connect_args={"timeout": 30, "isolation_level": None},
+    )
+
+    # Читатели работают параллельно писателю благодаря WAL,
+    # поэтому им выделен отдельный пул read-only соединений.
+    read_engine = create_async_engine(
+        READONLY_DATABASE_URL,
+        echo=_SQL_ECHO,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=os.cpu_count() or 4,
+        query_cache_size=1200,
+        connect_args={"timeout": 30},
+    )
+
+event.listen(write_engine.sync_engine, "connect", _set_sqlite_pragmas)
+event.listen(write_engine.sync_engine, "begin", _begin_immediate)
+if read_engine is not write_engine:
+    event.listen(
+        read_engine.sync_engine,
+        "connect",
+        _set_sqlite_readonly_pragmas,
+    )
+
+write_session_maker = async_sessionmaker(
+    bind=write_engine, expire_on_commit=False, class_=AsyncSession
 )
+read_session_maker = async_sessionmaker(
+    bind=read_engine, expire_on_commit=False, class_=AsyncSession
+)
+
+# Область видимости сессии — текущий HTTP-запрос. Идентификатор
+# выставляет DBSessionScopeMiddleware; contextvar копируется во все
+# задачи запроса, поэтому scope стабилен даже при стриминге ответа
+_session_scope: ContextVar[Optional[int]] = ContextVar(
+    "db_session_scope",
+    default=None,
+)
+_scope_ids = count(1)
+
+
+def _current_scope() -> Optional[int]:
+    return _session_scope.get()
+
+
+# Scoped-сессии создаются лениво при первом обращении внутри запроса
+# и переиспользуются всеми зависимостями этого запроса — без
+# конструирования и закрытия AsyncSession на каждый Depends
+write_session = async_scoped_session(
+    write_session_maker,
+    scopefunc=_current_scope,
+)
+read_session = async_scoped_session(
+    read_session_maker,
+    scopefunc=_current_scope,
+)
+
+
+async def get_db_write() -> AsyncSession:
+    """Сессия пишущего движка (INSERT/UPDATE), одна на запрос"""
+    return write_session()
+
+
+async def get_db_read() -> AsyncSession:
+    """Сессия читающего движка (только SELECT), одна на запрос"""
+    return read_session()
+
+
+class DBSessionScopeMiddleware:
+    """
+    Открывает область видимости сессий на время HTTP-запроса.
+
+    Чистое ASGI-middleware: не заводит отдельную задачу на запрос и
+    закрывает сессии только после полной отправки ответа, поэтому
+    стриминговые ответы могут безопасно читать из сессии.
+    """
 
+    def __init__(self, app) -> None:
+        self.app = app
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_maker() as session:
-        yield session
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _session_scope.set(next(_scope_ids))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await read_session.remove()
+            await write_session.remove()
+            _session_scope.reset(token)
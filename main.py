@@ -1,14 +1,169 @@
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator, List
+import asyncio
+import logging
+import os
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
 
-from fastapi import Depends, FastAPI, HTTPException, status
-from sqlalchemy import asc, desc
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import asc, bindparam, desc, insert, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.sql import lambda_stmt
 
 import models
 import schemas
-from database import engine, get_db
+from database import (
+    DBSessionScopeMiddleware,
+    get_db_read,
+    get_db_write,
+    read_engine,
+    write_engine,
+    write_session_maker,
+)
+
+logger = logging.getLogger(__name__)
+
+# Интервал сброса накопленных просмотров в базу (секунды)
+VIEWS_FLUSH_INTERVAL = 0.25
+
+# Размер пачки для массовой вставки
+# (ограничение SQLite на число переменных в запросе)
+BULK_CHUNK_SIZE = 500
+
+# Сколько строк списка сериализуется и отправляется за один чанк
+LIST_STREAM_CHUNK = 256
+
+# Содержимое корневого endpoint'а; тело ответа сериализуется
+# один раз при запуске приложения
+ROOT_INFO = {
+    "message": "Добро пожаловать в Cookbook API!",
+    "version": "1.0.0",
+    "docs": "/docs",
+    "redoc": "/redoc",
+    "endpoints": {
+        "create_recipe": {
+            "method": "POST",
+            "path": "/recipes/",
+            "description": "Создать новый рецепт",
+        },
+        "get_recipes": {
+            "method": "GET",
+            "path": "/recipes/",
+            "description": "Получить список всех рецептов",
+        },
+        "get_recipe": {
+            "method": "GET",
+            "path": "/recipes/{recipe_id}",
+            "description": "Получить детальную информацию о рецепте",
+        },
+    },
+}
+
+# Несброшенные инкременты просмотров: recipe_id -> дельта
+_pending_views: Counter = Counter()
+_pending_views_lock = asyncio.Lock()
+
+# Пачка, которая прямо сейчас записывается в базу. Пока коммит не
+# завершен, читатели складывают её с _pending_views — иначе на время
+# сброса все инкременты пачки "исчезали" бы из ответов
+_flushing_views: Dict[int, int] = {}
+
+# Кэш ответа списка: (версия, сериализованное тело).
+# Версия растет при каждом изменении видимых данных
+# (создание рецепта, просмотр), что инвалидирует кэш
+_list_version = 0
+_list_cache: Optional[Tuple[int, bytes]] = None
+
+# Уникальный префикс ETag на процесс: счетчики версий в разных
+# воркерах растут независимо, и без префикса ETag воркера A мог бы
+# случайно совпасть с версией воркера B, дав клиенту ложный 304
+_ETAG_SEED = uuid.uuid4().hex[:8]
+
+# Сериализатор списка собирается один раз: dump_json обходит весь
+# список на уровне C вместо N отдельных вызовов сериализации
+RECIPES_ADAPTER: TypeAdapter = TypeAdapter(List[schemas.RecipeOut])
+
+
+def _bump_list_version() -> None:
+    """Инвалидирует кэш списка после изменения видимых данных"""
+    global _list_version
+    _list_version += 1
+
+
+# Горячие запросы собираются один раз при импорте модуля,
+# чтобы не строить SQL-выражение заново на каждый запрос.
+# Список выбирает только отдаваемые колонки: тяжелые TEXT-поля
+# (ingredients, description) в выдачу списка не входят.
+LIST_STMT = lambda_stmt(
+    lambda: select(
+        models.Recipe.recipe_id,
+        models.Recipe.title,
+        models.Recipe.cooking_time,
+        models.Recipe.views,
+    ).order_by(desc(models.Recipe.views), asc(models.Recipe.cooking_time))
+)
+DETAIL_STMT = select(models.Recipe).where(
+    models.Recipe.recipe_id == bindparam("rid"),
+)
+VIEWS_UPDATE_STMT = (
+    update(models.Recipe)
+    .where(models.Recipe.recipe_id == bindparam("rid"))
+    .values(views=models.Recipe.views + bindparam("delta"))
+)
+
+
+async def _flush_pending_views() -> None:
+    """
+    Сбрасывает накопленные просмотры в базу одной транзакцией.
+    Один UPDATE на рецепт вместо UPDATE на каждый запрос.
+    """
+    global _flushing_views
+    async with _pending_views_lock:
+        if not _pending_views:
+            return
+        batch = dict(_pending_views)
+        _pending_views.clear()
+        _flushing_views = batch
+
+    try:
+        async with write_session_maker() as session:
+            for recipe_id, delta in batch.items():
+                await session.execute(
+                    VIEWS_UPDATE_STMT, {"rid": recipe_id, "delta": delta}
+                )
+            await session.commit()
+            # Сразу после коммита пачка учтена в базе — убираем её
+            # из слоя поверх, пока никто не успел посчитать дважды
+            _flushing_views = {}
+    except Exception:
+        # Неудавшаяся пачка возвращается в накопитель,
+        # чтобы инкременты не потерялись
+        async with _pending_views_lock:
+            for recipe_id, delta in batch.items():
+                _pending_views[recipe_id] += delta
+            _flushing_views = {}
+        raise
+
+
+async def _flush_views_loop() -> None:
+    """
+    Фоновая задача: периодически сбрасывает счетчики просмотров.
+    Ошибка одного сброса логируется и не останавливает задачу —
+    неудавшаяся пачка возвращается в накопитель и уйдет со следующим
+    тиком.
+    """
+    while True:
+        await asyncio.sleep(VIEWS_FLUSH_INTERVAL)
+        try:
+            await _flush_pending_views()
+        except (SQLAlchemyError, OSError):
+            logger.exception("Не удалось сбросить счетчики просмотров")
 
 
 @asynccontextmanager
@@ -19,21 +174,36 @@ async def lifespan(_application: FastAPI) -> AsyncGenerator[None, None]:
 
     При запуске:
     - Создает все таблицы в базе данных
+    - Запускает фоновый сброс счетчиков просмотров
     При завершении:
+    - Сбрасывает оставшиеся счетчики
     - Закрывает соединение с базой данных
     """
-    async with engine.begin() as conn:
+    async with write_engine.begin() as conn:
         await conn.run_sync(models.Base.metadata.create_all)
+    # Ответ корневого endpoint'а статичен — сериализуем один раз
+    _application.state.root_body = orjson.dumps(ROOT_INFO)
+    flush_task = asyncio.create_task(_flush_views_loop())
     yield
-    await engine.dispose()
+    flush_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await flush_task
+    try:
+        await _flush_pending_views()
+    except (SQLAlchemyError, OSError):
+        logger.exception("Не удалось сбросить счетчики при остановке")
+    await read_engine.dispose()
+    await write_engine.dispose()
 
 
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     title="Cookbook API",
     description="API для управления кулинарной книгой",
     version="1.0.0",
 )
+app.add_middleware(DBSessionScopeMiddleware)
 
 
 @app.post(
@@ -45,7 +215,8 @@ app = FastAPI(
     response_description="Созданный рецепт",
 )
 async def create_recipe(
-    recipe: schemas.RecipeIn, db: AsyncSession = Depends(get_db)  # noqa: B008
+    recipe: schemas.RecipeIn,
+    db: AsyncSession = Depends(get_db_write),  # noqa: B008
 ) -> schemas.RecipeOut:
     """
     Создает новый рецепт.
@@ -60,9 +231,12 @@ async def create_recipe(
     - HTTP 400: При ошибке валидации данных
     - HTTP 500: При внутренней ошибке сервера
     """
-    new_recipe = models.Recipe(**recipe.model_dump())
-    db.add(new_recipe)
+    # INSERT ... RETURNING возвращает строку с autogenerated-полями
+    # сразу, без отдельного SELECT через db.refresh()
+    values = recipe.model_dump()
+    stmt = insert(models.Recipe).values(**values).returning(models.Recipe)
     try:
+        new_recipe = (await db.execute(stmt)).scalar_one()
         await db.commit()
     except Exception as e:
         await db.rollback()
@@ -70,13 +244,70 @@ async def create_recipe(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Ошибка при создании рецепта: {str(e)}",
         )
-    await db.refresh(new_recipe)
+    _bump_list_version()
     return schemas.RecipeOut.model_validate(new_recipe)
 
 
+@app.post(
+    "/recipes/bulk",
+    response_model=List[int],
+    status_code=status.HTTP_201_CREATED,
+    summary="Создать несколько рецептов",
+    description="""Создает несколько рецептов одной транзакцией.
+    Вставка выполняется пачками по 500 строк — один INSERT и один
+    коммит вместо отдельного запроса на каждый рецепт.
+    """,
+    response_description="Список ID созданных рецептов",
+)
+async def create_recipes_bulk(
+    recipes: List[schemas.RecipeIn],
+    db: AsyncSession = Depends(get_db_write),  # noqa: B008
+) -> List[int]:
+    """
+    Создает несколько рецептов за одну транзакцию.
+
+    Параметры:
+    - **recipes**: Список данных новых рецептов (RecipeIn схемы)
+
+    Возвращает:
+    - Список ID созданных рецептов
+
+    Исключения:
+    - HTTP 400: При ошибке вставки данных
+    - HTTP 500: При внутренней ошибке сервера
+    """
+    rows = [recipe.model_dump() for recipe in recipes]
+    ids: List[int] = []
+    try:
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            end = start + BULK_CHUNK_SIZE
+            chunk = rows[start:end]
+            stmt = (
+                insert(models.Recipe)
+                .values(chunk)
+                .returning(
+                    models.Recipe.recipe_id,
+                )
+            )
+            result = await db.execute(stmt)
+            ids.extend(result.scalars().all())
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ошибка при создании рецептов: {str(e)}",
+        )
+    if ids:
+        _bump_list_version()
+    return ids
+
+
 @app.get(
     "/recipes/",
-    response_model=List[schemas.RecipeOut],
+    # Ответ сериализуется вручную через RECIPES_ADAPTER —
+    # response_model заставил бы FastAPI валидировать его повторно
+    response_model=None,
     summary="Получить список всех рецептов",
     description="""Возвращает список всех рецептов,
     отсортированных по популярности.
@@ -87,8 +318,9 @@ async def create_recipe(
     response_description="Список рецептов с основной информацией",
 )
 async def get_recipes(
-    db: AsyncSession = Depends(get_db),  # noqa: B008
-) -> List[schemas.RecipeOut]:
+    request: Request,
+    db: AsyncSession = Depends(get_db_read),  # noqa: B008
+) -> Response:
     """
     Получает список всех рецептов.
 
@@ -96,17 +328,86 @@ async def get_recipes(
     - Список рецептов, отсортированный по популярности и времени приготовления
     - Каждый рецепт содержит:
       ID, название, время приготовления, количество просмотров
+    - 304 Not Modified, если ETag клиента совпадает с текущей версией
 
     Исключения:
     - HTTP 500: При внутренней ошибке сервера
     """
-    query = select(models.Recipe).order_by(
-        desc(models.Recipe.views), asc(models.Recipe.cooking_time)
+    global _list_cache
+
+    # Пока данные не менялись, список можно отдать без похода в базу:
+    # либо 304 по ETag клиента, либо готовое сериализованное тело
+    etag = f'W/"{_ETAG_SEED}-{_list_version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    if _list_cache is not None and _list_cache[0] == _list_version:
+        return Response(
+            content=_list_cache[1],
+            media_type="application/json",
+            headers={"ETag": etag},
+        )
+    version = _list_version
+
+    async with _pending_views_lock:
+        pending = dict(_pending_views)
+        for rid, delta in _flushing_views.items():
+            pending[rid] = pending.get(rid, 0) + delta
+
+    if pending:
+        # Несброшенные просмотры могли изменить порядок сортировки —
+        # список приходится материализовать и пересортировать целиком.
+        # Данные пришли из базы и уже валидны — model_construct
+        # пропускает повторную проверку полей.
+        result = await db.execute(LIST_STMT)
+        items = [
+            schemas.RecipeOut.model_construct(
+                recipe_id=row.recipe_id,
+                title=row.title,
+                cooking_time=row.cooking_time,
+                views=row.views + pending.get(row.recipe_id, 0),
+            )
+            for row in result.all()
+        ]
+        items.sort(key=lambda item: (-item.views, item.cooking_time))
+        body = RECIPES_ADAPTER.dump_json(items)
+        _list_cache = (version, body)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"ETag": etag},
+        )
+
+    # Без несброшенных дельт порядок из базы финален — отдаем ответ
+    # потоком, пока SQLite еще читает строки: в памяти держится один
+    # чанк, а не весь список. Сессия закрывается после отдачи ответа,
+    # поэтому стримить из нее безопасно.
+    stream_result = await db.stream(
+        LIST_STMT, execution_options={"yield_per": LIST_STREAM_CHUNK}
     )
-    result = await db.execute(query)
-    recipes = result.scalars().all()
 
-    return [schemas.RecipeOut.model_validate(recipe) for recipe in recipes]
+    async def body_stream() -> AsyncGenerator[bytes, None]:
+        global _list_cache
+        chunks = [b"["]
+        yield b"["
+        first = True
+        async for partition in stream_result.partitions(LIST_STREAM_CHUNK):
+            encoded = (orjson.dumps(dict(row._mapping)) for row in partition)
+            piece = b",".join(encoded)
+            if not first:
+                piece = b"," + piece
+            first = False
+            chunks.append(piece)
+            yield piece
+        chunks.append(b"]")
+        yield b"]"
+        # Собранное тело пригодно для кэша: версия не менялась
+        _list_cache = (version, b"".join(chunks))
+
+    return StreamingResponse(
+        body_stream(),
+        media_type="application/json",
+        headers={"ETag": etag},
+    )
 
 
 @app.get(
@@ -119,7 +420,7 @@ async def get_recipes(
     response_description="Детальная информация о рецепте",
 )
 async def get_recipe(
-    recipe_id: int, db: AsyncSession = Depends(get_db)  # noqa: B008
+    recipe_id: int, db: AsyncSession = Depends(get_db_read)  # noqa: B008
 ) -> schemas.RecipeDetailOut:
     """
     Получает детальную информацию о рецепте по его ID.
@@ -135,25 +436,28 @@ async def get_recipe(
     - HTTP 404: Если рецепт с указанным ID не найден
     - HTTP 500: При внутренней ошибке сервера
     """
-    recipe = await db.get(models.Recipe, recipe_id)
+    result = await db.execute(DETAIL_STMT, {"rid": recipe_id})
+    recipe = result.scalar_one_or_none()
     if not recipe:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Рецепт с ID {recipe_id} не найден",
         )
 
-    recipe.views += 1
-    try:
-        await db.commit()
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Ошибка при обновлении счетчика просмотров: {str(e)}",
-        )
-    await db.refresh(recipe)
+    async with _pending_views_lock:
+        _pending_views[recipe_id] += 1
+        delta = _pending_views[recipe_id] + _flushing_views.get(recipe_id, 0)
+    _bump_list_version()
 
-    return schemas.RecipeDetailOut.model_validate(recipe)
+    # Клиент видит свой просмотр сразу, не дожидаясь сброса в базу
+    return schemas.RecipeDetailOut.model_construct(
+        recipe_id=recipe.recipe_id,
+        title=recipe.title,
+        cooking_time=recipe.cooking_time,
+        ingredients=recipe.ingredients,
+        description=recipe.description,
+        views=recipe.views + delta,
+    )
 
 
 @app.get(
@@ -161,34 +465,26 @@ async def get_recipe(
     summary="Информация о API",
     description="Основная информация о Cookbook API",
 )
-async def root():
+async def root() -> Response:
     """
     Корневой endpoint API.
 
     Возвращает:
-    - Основную информацию о API
+    - Основную информацию о API (сериализована один раз при запуске)
     - Ссылки на документацию
     """
-    return {
-        "message": "Добро пожаловать в Cookbook API!",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "redoc": "/redoc",
-        "endpoints": {
-            "create_recipe": {
-                "method": "POST",
-                "path": "/recipes/",
-                "description": "Создать новый рецепт",
-            },
-            "get_recipes": {
-                "method": "GET",
-                "path": "/recipes/",
-                "description": "Получить список всех рецептов",
-            },
-            "get_recipe": {
-                "method": "GET",
-                "path": "/recipes/{recipe_id}",
-                "description": "Получить детальную информацию о рецепте",
-            },
-        },
-    }
+    return Response(content=app.state.root_body, media_type="application/json")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvloop и httptools — C-реализации event loop и HTTP-парсера.
+    # Несколько воркеров безопасны для SQLite: записи идут через
+    # WAL + BEGIN IMMEDIATE, а чтения — через read-only пул.
+    uvicorn.run(
+        "main:app",
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count(),
+    )
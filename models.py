@@ -1,3 +1,4 @@
+from sqlalchemy import Index, asc, desc
 from sqlalchemy.orm import Mapped, mapped_column
 
 from database import Base
@@ -6,6 +7,19 @@ from database import Base
 class Recipe(Base):
     __tablename__ = "recipes"
 
+    # Покрывающий индекс под сортировку списка
+    # (views DESC, cooking_time ASC): убирает temp-btree сортировку,
+    # а recipe_id и title позволяют отдать список без чтения таблицы
+    __table_args__ = (
+        Index(
+            "ix_recipes_views_time",
+            desc("views"),
+            asc("cooking_time"),
+            "recipe_id",
+            "title",
+        ),
+    )
+
     recipe_id: Mapped[int] = mapped_column(primary_key=True, index=True)
     title: Mapped[str] = mapped_column(index=True, nullable=False)
     cooking_time: Mapped[int] = mapped_column(nullable=False)
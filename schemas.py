@@ -61,7 +61,13 @@ class RecipeIn(RecipeBase):
 
 
 class RecipeOut(RecipeBase):
-    """Схема для отображения рецепта в списке"""
+    """
+    Схема для отображения рецепта в списке.
+
+    frozen=True: экземпляры создаются только на отдачу и не меняются,
+    без защиты от мутаций валидатору не нужен setter-механизм;
+    extra='ignore' отбрасывает лишние атрибуты ORM-объектов.
+    """
 
     recipe_id: int = Field(
         ..., description="Уникальный идентификатор рецепта", examples=[1, 3]
@@ -72,11 +78,18 @@ class RecipeOut(RecipeBase):
         examples=[1, 42, 100, 50],
     )
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        extra="ignore",
+    )
 
 
 class RecipeDetailOut(RecipeIn):
-    """Схема для отображения детальной информации о рецепте"""
+    """
+    Схема для отображения детальной информации о рецепте.
+    Как и RecipeOut — неизменяемая схема только на отдачу.
+    """
 
     recipe_id: int = Field(
         ..., description="Уникальный идентификатор рецепта", examples=[1, 3]
@@ -87,4 +100,8 @@ class RecipeDetailOut(RecipeIn):
         examples=[1, 42, 100, 50],
     )
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        extra="ignore",
+    )
@@ -1,25 +1,6 @@
-import asyncio
-
-from fastapi.testclient import TestClient
-
-from database import Base, engine
-from main import app
-
-
-async def setup_database():
-    """Создает таблицы в основной БД"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    await engine.dispose()
-
-
-asyncio.run(setup_database())
-client = TestClient(app)
-
-
-def test_root():
+async def test_root(client):
     """Тест корневого endpoint'а"""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     data = response.json()
     assert data["message"] == "Добро пожаловать в Cookbook API!"
@@ -27,21 +8,21 @@ def test_root():
     assert "endpoints" in data
 
 
-def test_get_recipes():
+async def test_get_recipes(client):
     """Тест получения списка рецептов"""
-    response = client.get("/recipes/")
+    response = await client.get("/recipes/")
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
 
-def test_get_recipe_not_found():
+async def test_get_recipe_not_found(client):
     """Тест получения несуществующего рецепта"""
-    response = client.get("/recipes/999999")
+    response = await client.get("/recipes/999999")
     assert response.status_code == 404
     assert "не найден" in response.json()["detail"]
 
 
-def test_create_recipe():
+async def test_create_recipe(client):
     """Тест создания рецепта"""
     recipe_data = {
         "title": "Тестовый рецепт",
@@ -50,7 +31,7 @@ def test_create_recipe():
         "description": "Тестовое описание",
     }
 
-    response = client.post("/recipes/", json=recipe_data)
+    response = await client.post("/recipes/", json=recipe_data)
     assert response.status_code == 201
 
     data = response.json()
@@ -61,9 +42,34 @@ def test_create_recipe():
     assert data["views"] == 0
 
 
-def test_create_recipe_validation_error():
+async def test_create_recipes_bulk(client):
+    """Тест массового создания рецептов"""
+    recipes_data = [
+        {
+            "title": f"Массовый рецепт {i}",
+            "cooking_time": 10 + i,
+            "ingredients": "Тестовые ингредиенты",
+            "description": "Тестовое описание",
+        }
+        for i in range(3)
+    ]
+
+    response = await client.post("/recipes/bulk", json=recipes_data)
+    assert response.status_code == 201
+
+    ids = response.json()
+    assert isinstance(ids, list)
+    assert len(ids) == len(recipes_data)
+
+    # Созданные рецепты доступны по ID
+    response = await client.get(f"/recipes/{ids[0]}")
+    assert response.status_code == 200
+    assert response.json()["title"] == recipes_data[0]["title"]
+
+
+async def test_create_recipe_validation_error(client):
     """Тест валидации данных при создании рецепта"""
-    response = client.post(
+    response = await client.post(
         "/recipes/",
         json={
             "title": "Тестовый",
@@ -76,9 +82,9 @@ def test_create_recipe_validation_error():
     assert "cooking_time" in response.json()["detail"][0]["loc"]
 
 
-def test_create_recipe_missing_fields():
+async def test_create_recipe_missing_fields(client):
     """Тест создания рецепта с отсутствующими полями"""
-    response = client.post(
+    response = await client.post(
         "/recipes/",
         json={
             "title": "Неполный рецепт"
@@ -89,7 +95,7 @@ def test_create_recipe_missing_fields():
     assert response.json()["detail"][0]["msg"] == "Field required"
 
 
-def test_get_recipe_and_increment_views():
+async def test_get_recipe_and_increment_views(client):
     """Тест, что просмотры увеличиваются при получении рецепта"""
     recipe_data = {
         "title": "Рецепт для теста просмотров",
@@ -97,16 +103,16 @@ def test_get_recipe_and_increment_views():
         "ingredients": "Ингредиенты",
         "description": "Описание",
     }
-    create_response = client.post("/recipes/", json=recipe_data)
+    create_response = await client.post("/recipes/", json=recipe_data)
     recipe_id = create_response.json()["recipe_id"]
 
     # Получаем рецепт первый раз
-    response1 = client.get(f"/recipes/{recipe_id}")
+    response1 = await client.get(f"/recipes/{recipe_id}")
     assert response1.status_code == 200
     views1 = response1.json()["views"]
 
     # Получаем рецепт второй раз
-    response2 = client.get(f"/recipes/{recipe_id}")
+    response2 = await client.get(f"/recipes/{recipe_id}")
     assert response2.status_code == 200
     views2 = response2.json()["views"]
 
@@ -114,7 +120,7 @@ def test_get_recipe_and_increment_views():
     assert views2 == views1 + 1
 
 
-def test_sorting_order():
+async def test_sorting_order(client):
     """Тест правильности сортировки рецептов"""
     recipes = [
         {
@@ -146,17 +152,17 @@ def test_sorting_order():
     created_ids = []
 
     for recipe in recipes:
-        response = client.post("/recipes/", json=recipe)
+        response = await client.post("/recipes/", json=recipe)
         assert response.status_code == 201
         created_ids.append(response.json()["recipe_id"])
 
     # ДОБАВЛЯЕМ ПРОСМОТРЫ для проверки сортировки
-    client.get(f"/recipes/{created_ids[0]}")
-    client.get(f"/recipes/{created_ids[0]}")
-    client.get(f"/recipes/{created_ids[2]}")
+    await client.get(f"/recipes/{created_ids[0]}")
+    await client.get(f"/recipes/{created_ids[0]}")
+    await client.get(f"/recipes/{created_ids[2]}")
 
     # Получаем список
-    response = client.get("/recipes/")
+    response = await client.get("/recipes/")
     assert response.status_code == 200
     recipes_list = response.json()
 
@@ -191,7 +197,7 @@ def test_sorting_order():
     )
 
 
-def test_recipe_detail_contains_all_fields():
+async def test_recipe_detail_contains_all_fields(client):
     """Тест, что детальная информация содержит все поля"""
     recipe_data = {
         "title": "Тестовый рецепт",
@@ -199,11 +205,11 @@ def test_recipe_detail_contains_all_fields():
         "ingredients": "Ингредиенты\nсписок",
         "description": "Подробное описание",
     }
-    create_response = client.post("/recipes/", json=recipe_data)
+    create_response = await client.post("/recipes/", json=recipe_data)
     recipe_id = create_response.json()["recipe_id"]
 
     # Получаем детальную информацию
-    response = client.get(f"/recipes/{recipe_id}")
+    response = await client.get(f"/recipes/{recipe_id}")
     assert response.status_code == 200
 
     data = response.json()